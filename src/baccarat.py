@@ -8,10 +8,8 @@ Usage:
 """
 
 
-import itertools
 from dataclasses import dataclass
-from functools import lru_cache
-from math import perm
+from functools import cached_property
 from collections import defaultdict
 from typing import Tuple, Dict
 
@@ -52,6 +50,80 @@ BANKER_DRAW_MAP = {
     9: set(),
 }
 
+# Same rules packed as one bitmask per banker_sum: bit c3 is set when the
+# banker draws against a player third card of value c3, so the hot-path test
+# is `(DRAW_MASKS[banker_sum] >> c3) & 1` instead of a set probe.
+#   0‑2 : 0x3FF (all ten bits)     3 : 0x2FF (all but bit 8)
+#   4   : 0x0FC (bits 2‑7)         5 : 0x0F0 (bits 4‑7)
+#   6   : 0x0C0 (bits 6‑7)         7‑9 : 0 (never draws)
+DRAW_MASKS = tuple(
+    sum(1 << c3 for c3 in BANKER_DRAW_MAP[banker_sum]) for banker_sum in range(10)
+)
+
+
+# Extra slots appended to the shoe left after the 4-card prefix, standing for
+# a third card that is not drawn: it can be any of the cards_left cards when
+# it is the first of c3 / c6 to be dealt, or any of cards_left - 1 after one.
+ANY_FIRST = 10
+ANY_SECOND = 11
+
+
+def _hand_endings(player_sum: int, banker_sum: int) -> Tuple[Tuple[int, int, int, int, int], ...]:
+    """
+    Apply the drawing rules to every way a hand can finish from the given
+    two-card totals.
+
+    Returns one (first, second, repeat, banker_final, player_final) entry per
+    distinct way the third cards can affect the result.  Third cards that are
+    not drawn do not change the result, so they are left out instead of being
+    enumerated.  first / second index the shoe left after the prefix, extended
+    with ANY_FIRST / ANY_SECOND, so that for every entry the ways to deal c3
+    and c6 are
+
+        left[first] * (left[second] - repeat)
+
+    with repeat = 1 when both third cards are drawn with the same value (the
+    second copy comes from a shoe that is one card short).  That keeps the
+    caller free of any branching on which cards were drawn.
+    """
+    endings = []
+
+    # Begin standard drawing rules:
+
+    # Player stands if 6 or 7
+    if player_sum in (6, 7):
+        # Banker draws if sum <= 5
+        if banker_sum <= 5:
+            for c6 in range(10):
+                endings.append((c6, ANY_SECOND, 0, (banker_sum + c6) % 10, player_sum))
+        else:
+            endings.append((ANY_FIRST, ANY_SECOND, 0, banker_sum, player_sum))
+    # Otherwise if player_sum <= 5 and banker_sum < 8, player draws c3
+    elif player_sum <= 5 and banker_sum < 8:
+        for c3 in range(10):
+            player_final = (player_sum + c3) % 10
+
+            # Banker draw rules, using the bitmasks
+            # (totals 7‑9 have an empty mask, so no range check is needed)
+            if (DRAW_MASKS[banker_sum] >> c3) & 1:
+                for c6 in range(10):
+                    endings.append((c3, c6, int(c6 == c3), (banker_sum + c6) % 10, player_final))
+            else:
+                endings.append((c3, ANY_SECOND, 0, banker_sum, player_final))
+    # Naturals: both hands stand
+    else:
+        endings.append((ANY_FIRST, ANY_SECOND, 0, banker_sum, player_sum))
+
+    return tuple(endings)
+
+
+# Outcome of the drawing rules memoized once for all 10×10 two-card totals:
+# HAND_ENDINGS[player_sum][banker_sum] = _hand_endings(player_sum, banker_sum)
+HAND_ENDINGS = tuple(
+    tuple(_hand_endings(player_sum, banker_sum) for banker_sum in range(10))
+    for player_sum in range(10)
+)
+
 
 @dataclass(frozen=True)
 class Shoe:
@@ -65,7 +137,10 @@ class Shoe:
     """
     num_decks: int
 
-    @property
+    # The shoe is frozen, so the tuple is built on first access and then
+    # cached on the instance (cached_property writes to __dict__ directly,
+    # which the frozen dataclass __setattr__ does not block).
+    @cached_property
     def frequencies(self) -> Tuple[int, ...]:
         # 0‐value cards: 4 ranks × 4 suits × decks
         zeroes = self.num_decks * 4 * 4  # For 6 decks, this is equal to 96
@@ -102,51 +177,15 @@ class BaccaratCalculator:
         # (banker_sum, player_sum)
         self.banker_breakdown: Dict[Tuple[int, int], int] = defaultdict(int)
 
+        # Same results as flat int lists, indexed by small ints instead of
+        # string / tuple keys: counts_arr is [player, banker, tie] and
+        # breakdown_arr[banker_sum][player_sum] holds banker-winning ways
+        self.counts_arr = [0, 0, 0]
+        self.breakdown_arr = [[0] * 10 for _ in range(10)]
+
         # Total ways all outcomes can occur
         self.total = 0
     
-    @lru_cache(maxsize=None)
-    def _count_permutations_of_hand(self, hand: Tuple[int, ...]) -> int:
-        """
-        Given a 6-card tuple (hand), return how many distinct ways
-        one can draw those cards in that exact order from the shoe.
-
-        Theory recap:
-        - A Baccarat shoe is a multiset (e.g. 96 zero-value cards, 24 ones, …)
-        - If a particular value i appears kᵢ times in the proposed 6-card sequence
-          and the shoe still contains nᵢ copies, then there are
-
-                P(nᵢ, kᵢ) = nᵢ! / (nᵢ - kᵢ)!
-
-          ordered ways to draw those kᵢ cards.
-        - Because draws of different ranks are independent, the total #ways is the
-          product of P(nᵢ, kᵢ) over all ten ranks
-            
-        Process:
-          1. Count how many times each card value i appears (hand_freq[i]).
-          2. Check if hand_freq[i] <= deck_frequency[i]. If not, it's invalid (0).
-          3. Multiply P(deck_frequency[i], hand_freq[i]) across all i.
-        """
-        hand_freq = [0] * 10
-        
-        # Count frequency of each card value in the hand
-        for c in hand:
-            hand_freq[c] += 1
-        
-        ways = 1
-
-        # Multiply permutations for each card value
-        for i in range(10):
-
-            # Check if kᵢ (cards of rank i in this sequence) > nᵢ (remaining in the shoe)
-            if hand_freq[i] > self.deck_frequency[i]:
-                return 0  # Not enough copies in the shoe, exit early
-            
-            # Multiply by P(nᵢ, kᵢ).  When kᵢ is 0 the factor is 1.
-            ways *= perm(self.deck_frequency[i], hand_freq[i])
-        
-        return ways
-
     def run_calculations(self) -> None:
         """
         Enumerate all possible 6-card permutations (with replacement) from
@@ -157,54 +196,105 @@ class BaccaratCalculator:
             for banker-winners only, how many ways the Banker ends on b_sum and 
             the Player on p_sum (p_sum < b_sum).
         - self.total: grand total of all valid sequences examined.
+
+        Theory recap:
+        - A Baccarat shoe is a multiset (e.g. 96 zero-value cards, 24 ones, …)
+        - Drawing the 6 cards one after another, the k-th card of value v can
+          be any of the copies of v still left in the shoe, so the number of
+          ordered ways to draw a specific sequence is the product, over the six
+          positions, of how many copies of that value remain at that point.
+          (Grouped by value this is the product of P(nᵢ, kᵢ) = nᵢ! / (nᵢ - kᵢ)!.)
+
+        The sequence is c1..c6 with c1, c2 the Player's first two cards, c3 the
+        Player's third card, c4, c5 the Banker's first two cards and c6 the
+        Banker's third card.  The outcome only depends on c1, c2 and c4, c5
+        through the two-card totals, so the work is factored in two passes:
+
+        1. Walk the 10^4 prefixes (c1, c2, c4, c5) with nested loops, building
+           the ways of each prefix incrementally from a working copy of the
+           shoe (remaining), and aggregate them by (player total, banker total,
+           shoe left after the prefix).  Many prefixes share a key.
+        2. For each aggregated prefix, look up the ways the hand can finish in
+           HAND_ENDINGS, where the drawing rules have already been applied once
+           per c3 / c6 actually drawn.  A card that is not drawn can be any
+           card left in the shoe, so it just contributes the number of cards
+           left.
         """
 
-        deck = self.deck
-        counts = self.counts
-        breakdown = self.banker_breakdown
-        
-        # every 6‑tuple of card values
-        for hand in itertools.product(deck, repeat=6):
-            # Compute how many ways this exact 6-card sequence can occur
-            ways = self._count_permutations_of_hand(hand)
-            if ways == 0:
-                # Invalid sequence given the deck frequencies
-                continue
-
-            # Compute final sums
-            c1, c2, c3, c4, c5, c6 = hand
-            
-            # Two‑card totals (mod‑10) before any draws
-            player_sum = (c1 + c2) % 10
-            banker_sum = (c4 + c5) % 10
-
-            # Begin standard drawing rules:
-
-            # Player stands if 6 or 7
-            if player_sum in (6, 7):
-                # Banker draws if sum <= 5
-                if banker_sum <= 5:
-                    banker_sum = (banker_sum + c6) % 10
-            # Otherwise if player_sum <= 5 and banker_sum < 8, player draws c3
-            elif player_sum <= 5 and banker_sum < 8:
-                player_sum = (player_sum + c3) % 10
-
-                # Banker draw rules, using the mapping for speed
-                # only bother if banker_sum <= 6
-                if banker_sum <= 6 and c3 in BANKER_DRAW_MAP[banker_sum]:
-                    banker_sum = (banker_sum + c6) % 10
-
-            # Determine outcome
-            if player_sum > banker_sum:
-                counts['player'] += ways
-            elif banker_sum > player_sum:
-                counts['banker'] += ways
-                breakdown[(banker_sum, player_sum)] += ways
-            else:
-                counts['tie'] += ways
+        # Working copy of the shoe: copies of each value not yet drawn
+        remaining = list(self.deck_frequency)
+        cards_left = sum(remaining) - 4  # after the 4-card prefix
+
+        # Pass 1: (player_sum, banker_sum, remaining after prefix) -> ways
+        prefix_ways: Dict[Tuple[int, int, Tuple[int, ...]], int] = defaultdict(int)
+
+        for c1 in range(10):
+            ways1 = remaining[c1]
+            if ways1 == 0:
+                continue  # No copies of this value left in the shoe
+            remaining[c1] -= 1
+            for c2 in range(10):
+                ways2 = ways1 * remaining[c2]
+                if ways2 == 0:
+                    continue
+                remaining[c2] -= 1
+
+                # Player's two‑card total (mod‑10) before any draws
+                player_sum = (c1 + c2) % 10
+
+                for c4 in range(10):
+                    ways4 = ways2 * remaining[c4]
+                    if ways4 == 0:
+                        continue
+                    remaining[c4] -= 1
+                    for c5 in range(10):
+                        ways5 = ways4 * remaining[c5]
+                        if ways5 == 0:
+                            continue
+                        remaining[c5] -= 1
+
+                        # Banker's two‑card total (mod‑10) before any draws
+                        banker_sum = (c4 + c5) % 10
+
+                        prefix_ways[(player_sum, banker_sum, tuple(remaining))] += ways5
+                        remaining[c5] += 1
+                    remaining[c4] += 1
+                remaining[c2] += 1
+            remaining[c1] += 1
+
+        # Pass 2: final_ways[banker_final][player_final] over all 6-card sequences
+        final_ways = [[0] * 10 for _ in range(10)]
+
+        for (player_sum, banker_sum, rest), ways in prefix_ways.items():
+            # Ways to deal c3 and c6: drawn cards come from what is left, an
+            # undrawn card can be any card still left in the shoe
+            left = rest + (cards_left, cards_left - 1)  # ANY_FIRST, ANY_SECOND
+            for first, second, repeat, banker_final, player_final in HAND_ENDINGS[player_sum][banker_sum]:
+                final_ways[banker_final][player_final] += ways * left[first] * (left[second] - repeat)
+
+        # Determine outcomes
+        counts_arr = self.counts_arr = [0, 0, 0]
+        breakdown_arr = self.breakdown_arr = [[0] * 10 for _ in range(10)]
+        for banker_sum in range(10):
+            for player_sum in range(10):
+                ways = final_ways[banker_sum][player_sum]
+                if player_sum > banker_sum:
+                    counts_arr[0] += ways
+                elif banker_sum > player_sum:
+                    counts_arr[1] += ways
+                    breakdown_arr[banker_sum][player_sum] += ways
+                else:
+                    counts_arr[2] += ways
+
+        # Also expose the results through the dict-shaped attributes
+        self.counts['player'], self.counts['banker'], self.counts['tie'] = counts_arr
+        for banker_sum in range(10):
+            for player_sum in range(banker_sum):
+                if breakdown_arr[banker_sum][player_sum]:
+                    self.banker_breakdown[(banker_sum, player_sum)] = breakdown_arr[banker_sum][player_sum]
 
         # Store grand total for later probability reporting
-        self.total = counts['player'] + counts['banker'] + counts['tie']
+        self.total = sum(counts_arr)
 
     def print_results(self) -> None:
         """
@@ -224,9 +314,8 @@ class BaccaratCalculator:
 
         3. Corresponding probabilities (relative frequencies).
         """
-        b_wins = self.counts['banker']
-        p_wins = self.counts['player']
-        ties = self.counts['tie']
+        p_wins, b_wins, ties = self.counts_arr
+        breakdown = self.breakdown_arr
         total = self.total
 
         # Print banker wins breakdown by banker sum
@@ -235,13 +324,13 @@ class BaccaratCalculator:
 
             # Only player totals STRICTLY LESS than banker_total can be losses
             for p_sum in range(b_sum):
-                total_for_b_sum += self.banker_breakdown[(b_sum, p_sum)]
+                total_for_b_sum += breakdown[b_sum][p_sum]
             
             if total_for_b_sum > 0:
                 print(f"=== Banker final point {b_sum} ===")
                 sub_total = 0
                 for p_sum in range(b_sum):
-                    cnt = self.banker_breakdown[(b_sum, p_sum)]
+                    cnt = breakdown[b_sum][p_sum]
                     
                     if cnt > 0:  # skip rows that never occur
                         sub_total += cnt
@@ -258,8 +347,8 @@ class BaccaratCalculator:
         print(f"Total overall possibilities:  {total:,}\n")
 
         # Probabilities
-        banker6 = sum(self.banker_breakdown[(6, p)] for p in range(6))
-        banker_other = self.counts['banker'] - banker6
+        banker6 = sum(breakdown[6][:6])
+        banker_other = b_wins - banker6
 
         print(f"P(Player):                      {p_wins / total:.4%}.")
         print(f"P(Banker):                      {b_wins / total:.4%}.")